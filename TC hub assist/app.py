@@ -1,56 +1,467 @@
 from flask import Flask, render_template, request, jsonify, redirect, url_for, send_file
+import hashlib
 import json
+import math
 import os
+import sqlite3
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import count, repeat
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from difflib import SequenceMatcher
 from typing import List, Dict, Optional
-from werkzeug.utils import secure_filename
+import io
+import threading
 import zipfile
-import tempfile
-import shutil
+
+# flask-compress gzips large responses transparently when installed.
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+# rapidfuzz scores names in C; difflib.SequenceMatcher remains the fallback.
+try:
+    from rapidfuzz import fuzz
+except ImportError:
+    fuzz = None
+
+# orjson is a drop-in speedup for (de)serialization; fall back to stdlib json.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional fast path for similarity screening: vectorized TF-IDF char n-grams
+# plus a sparse top-n matrix product instead of a pairwise Python loop.
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sparse_dot_topn import sp_matmul_topn
+    SPARSE_MATCHING_AVAILABLE = True
+except ImportError:
+    SPARSE_MATCHING_AVAILABLE = False
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.config['UPLOAD_FOLDER'] = 'uploads'
 ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
 
-# Create uploads directory if it doesn't exist
-if not os.path.exists(app.config['UPLOAD_FOLDER']):
-    os.makedirs(app.config['UPLOAD_FOLDER'])
+if Compress is not None:
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    Compress(app)
+
+if orjson is not None:
+    from flask.json.provider import JSONProvider
+
+    class OrjsonProvider(JSONProvider):
+        """Serve API responses through orjson instead of stdlib json"""
+
+        def dumps(self, obj, **kwargs) -> str:
+            return orjson.dumps(obj, default=str).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _loads(s):
+    """Parse JSON with orjson when available"""
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+def _dumps_line(record) -> str:
+    """Serialize one record to a single JSON line"""
+    if orjson is not None:
+        return orjson.dumps(record, default=str).decode()
+    return json.dumps(record, default=str)
+
+@lru_cache(maxsize=200_000)
+def _ratio(a: str, b: str) -> float:
+    """Memoized similarity ratio over normalized names"""
+    if fuzz is not None:
+        return fuzz.ratio(a, b) / 100.0
+    return SequenceMatcher(None, a, b).ratio()
+
+def _symmetric_ratio(a: str, b: str) -> float:
+    """Order the pair so (a, b) and (b, a) share one cache entry"""
+    if b < a:
+        a, b = b, a
+    return _ratio(a, b)
+
+def _trigrams(name_norm: str) -> set:
+    """Character trigrams of a normalized name (short names index whole)"""
+    if len(name_norm) < 3:
+        return {name_norm} if name_norm else set()
+    return {name_norm[i:i + 3] for i in range(len(name_norm) - 2)}
+
+def _build_party_trigram_index(party_norms: List[str]):
+    """Trigram inverted index plus per-party trigram sets"""
+    index: Dict[str, List[int]] = {}
+    party_trigrams = []
+    for party_idx, p_norm in enumerate(party_norms):
+        grams = _trigrams(p_norm)
+        party_trigrams.append(grams)
+        for gram in grams:
+            index.setdefault(gram, []).append(party_idx)
+    return index, party_trigrams
+
+def _score_chunk(customers, customer_norms, parties, party_norms, threshold,
+                 trigram_index=None, party_trigrams=None):
+    """Score a chunk of customers against all parties
+
+    Kept at module level so it is picklable and can run in a worker
+    process; the trigram index is rebuilt per worker when not supplied.
+    """
+    if trigram_index is None:
+        trigram_index, party_trigrams = _build_party_trigram_index(party_norms)
+
+    party_lens = np.fromiter((len(p_norm) for p_norm in party_norms),
+                             dtype=np.int32, count=len(party_norms))
+    party_gram_counts = np.fromiter((len(grams) for grams in party_trigrams),
+                                    dtype=np.int32, count=len(party_trigrams))
+
+    similar_matches = []
+    for customer, c_norm in zip(customers, customer_norms):
+        len_c = len(c_norm)
+        c_grams = _trigrams(c_norm)
+
+        # Blocking: only parties sharing enough trigrams with this customer
+        # are candidates, which prunes the vast majority of pairs.
+        overlap = Counter()
+        for gram in c_grams:
+            for party_idx in trigram_index.get(gram, ()):
+                overlap[party_idx] += 1
+        if not overlap:
+            continue
+
+        candidates = np.fromiter(overlap.keys(), dtype=np.intp, count=len(overlap))
+        shared = np.fromiter(overlap.values(), dtype=np.int32, count=len(overlap))
+
+        # One broadcast applies both cheap filters to every candidate: the
+        # trigram-overlap floor and the 2*min(len)/(len_a+len_b) upper bound
+        # that ratio() can never exceed.
+        candidate_lens = party_lens[candidates]
+        upper = 2 * np.minimum(len_c, candidate_lens) / np.maximum(len_c + candidate_lens, 1)
+        min_grams = np.minimum(len(c_grams), party_gram_counts[candidates])
+        keep = candidates[(shared >= np.ceil(threshold * min_grams)) & (upper >= threshold)]
+
+        # SequenceMatcher caches the b2j index of seq2, so one matcher per
+        # customer amortizes that setup across all of its candidates.
+        matcher = None
+
+        for party_idx in keep:
+            party = parties[party_idx]
+            p_norm = party_norms[party_idx]
+
+            if fuzz is not None:
+                # score_cutoff lets rapidfuzz bail out early in C
+                similarity = fuzz.ratio(c_norm, p_norm, score_cutoff=threshold * 100) / 100.0
+                if similarity < threshold:
+                    continue
+            else:
+                if matcher is None:
+                    matcher = SequenceMatcher(autojunk=False)
+                    matcher.set_seq2(c_norm)
+                matcher.set_seq1(p_norm)
+                if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                    continue
+                similarity = matcher.ratio()
+            if similarity >= threshold and similarity < 1.0:
+                similar_matches.append({
+                    "customer": customer,
+                    "restricted_party": party,
+                    "similarity": similarity,
+                    "match_type": "similar",
+                    "match_date": datetime.now().isoformat()
+                })
+
+    return similar_matches
+
+class _BloomFilter:
+    """Minimal Bloom filter over normalized names
+
+    One blake2b digest per item yields two 64-bit hashes that are combined
+    into PROBES bit positions (Kirsch-Mitzenmacher); at 16 bits per item of
+    capacity the false-positive rate stays well under 0.1%.
+    """
+    PROBES = 10
+    BITS_PER_ITEM = 16
+
+    def __init__(self, capacity: int, bits: bytes = None):
+        self.capacity = max(capacity, 1024)
+        self.num_bits = self.capacity * self.BITS_PER_ITEM
+        self.bits = bytearray(self.num_bits // 8) if bits is None else bytearray(bits)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.PROBES))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7))
+                   for pos in self._positions(item))
+
 class CustomerRestrictedPartyTool:
     def __init__(self):
-        self.customers_file = "customers.json"
-        self.restricted_parties_file = "restricted_parties.json"
-        self.matches_file = "matches.json"
-        self.customers = self.load_data(self.customers_file)
-        self.restricted_parties = self.load_data(self.restricted_parties_file)
-        self.matches = self.load_data(self.matches_file)
-
-    def load_data(self, filename: str) -> List[Dict]:
-        """Load data from JSON file or return empty list if file doesn't exist"""
-        if os.path.exists(filename):
+        self.db_file = "screening.db"
+        # isolation_level=None leaves transaction control to explicit
+        # BEGIN/COMMIT. The sqlite3 module only serializes individual
+        # statements across threads, not transactions, so multi-statement
+        # writes on this shared connection take _db_lock.
+        self.conn = sqlite3.connect(self.db_file, isolation_level=None,
+                                    check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._fts_enabled = self._create_schema()
+        self._migrate_legacy_files()
+        self.customers = self._load_table("customers")
+        self.restricted_parties = self._load_table("restricted_parties")
+        self.matches = self._load_table("matches")
+        # Monotonic id counters; len(list)+1 collides after deletions
+        self._cust_id = count(max((c["id"] for c in self.customers), default=0) + 1)
+        self._party_id = count(max((p["id"] for p in self.restricted_parties), default=0) + 1)
+        self._tfidf_state = None
+        self._trigram_state = None
+        self._party_index_state = None
+        self._cust_ver = self._load_version('cust_ver')
+        self._party_ver = self._load_version('party_ver')
+        self._screening_cache = {}
+        self._rebuild_norm_arrays()
+
+    def _create_schema(self) -> bool:
+        """Create tables, indexes and the trigram FTS index when supported"""
+        for table in ("customers", "restricted_parties"):
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(id INTEGER PRIMARY KEY, name_norm TEXT NOT NULL, data TEXT NOT NULL)")
+            self.conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_name_norm ON {table}(name_norm)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS matches "
+            "(seq INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS restricted_parties_fts USING fts5"
+                "(name_norm, content='restricted_parties', content_rowid='id',"
+                " tokenize='trigram')")
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 or older than 3.34 (no trigram tokenizer)
+            return False
+
+        # Triggers keep the external-content FTS table in sync with every write
+        self.conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS restricted_parties_ai
+            AFTER INSERT ON restricted_parties BEGIN
+                INSERT INTO restricted_parties_fts(rowid, name_norm)
+                VALUES (new.id, new.name_norm);
+            END;
+            CREATE TRIGGER IF NOT EXISTS restricted_parties_ad
+            AFTER DELETE ON restricted_parties BEGIN
+                INSERT INTO restricted_parties_fts(restricted_parties_fts, rowid, name_norm)
+                VALUES ('delete', old.id, old.name_norm);
+            END;
+            CREATE TRIGGER IF NOT EXISTS restricted_parties_au
+            AFTER UPDATE ON restricted_parties BEGIN
+                INSERT INTO restricted_parties_fts(restricted_parties_fts, rowid, name_norm)
+                VALUES ('delete', old.id, old.name_norm);
+                INSERT INTO restricted_parties_fts(rowid, name_norm)
+                VALUES (new.id, new.name_norm);
+            END;
+        """)
+        return True
+
+    def _migrate_legacy_files(self):
+        """One-time import of data files left by the previous JSONL/JSON storage"""
+        for table, filename in (("customers", "customers.jsonl"),
+                                ("restricted_parties", "restricted_parties.jsonl"),
+                                ("matches", "matches.jsonl")):
+            if self.conn.execute(f"SELECT EXISTS(SELECT 1 FROM {table})").fetchone()[0]:
+                continue
+            records = self._load_legacy_records(filename)
+            if not records:
+                continue
+            if table == "matches":
+                self._save_matches(records)
+            else:
+                # The legacy len(list)+1 id scheme produced duplicate ids
+                # after deletions; reassign fresh ids so the PRIMARY KEY
+                # never silently drops a colliding record.
+                seen_ids = set()
+                next_id = max((record["id"] for record in records), default=0) + 1
+                for record in records:
+                    if "name_norm" not in record:
+                        record["name_norm"] = record["name"].strip().lower()
+                    if record["id"] in seen_ids:
+                        record["id"] = next_id
+                        next_id += 1
+                    seen_ids.add(record["id"])
+                self._insert_records(table, records)
+
+    @staticmethod
+    def _load_legacy_records(filename: str) -> List[Dict]:
+        """Read records from a pre-SQLite JSON Lines (or older JSON) data file"""
+        if not os.path.exists(filename):
+            legacy_file = filename.removesuffix('.jsonl') + '.json'
+            if not os.path.exists(legacy_file):
+                return []
             try:
-                with open(filename, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
+                with open(legacy_file, 'rb') as f:
+                    return _loads(f.read())
+            except ValueError:
                 return []
-        return []
 
-    def save_data(self, data: List[Dict], filename: str):
-        """Save data to JSON file"""
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        records: List[Dict] = []
+        by_id: Dict = {}
+        try:
+            with open(filename, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    entry = _loads(line)
+                    op = entry.pop("_op", None)
+                    if op == "del":
+                        record = by_id.pop(entry["id"], None)
+                        if record is not None:
+                            records.remove(record)
+                    elif op == "upd":
+                        record = by_id.get(entry.pop("id"))
+                        if record is not None:
+                            record.update(entry)
+                    else:
+                        records.append(entry)
+                        if "id" in entry:
+                            by_id[entry["id"]] = entry
+        except (ValueError, KeyError):
+            return []
+        return records
+
+    def _load_table(self, table: str) -> List[Dict]:
+        """Load a table's records into the in-memory working set"""
+        return [_loads(row[0]) for row in
+                self.conn.execute(f"SELECT data FROM {table} ORDER BY rowid")]
+
+    def _insert_records(self, table: str, records: List[Dict]):
+        """Insert new records in one statement; triggers keep FTS in sync"""
+        self.conn.executemany(
+            f"INSERT INTO {table}(id, name_norm, data) VALUES (?, ?, ?)",
+            ((record["id"], record["name_norm"], _dumps_line(record))
+             for record in records))
+
+    def _update_record(self, table: str, record: Dict):
+        """Rewrite one record's row in place"""
+        self.conn.execute(
+            f"UPDATE {table} SET name_norm = ?, data = ? WHERE id = ?",
+            (record["name_norm"], _dumps_line(record), record["id"]))
+
+    def _delete_record(self, table: str, record_id: int):
+        """Delete one record's row"""
+        self.conn.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,))
+
+    def _load_version(self, key: str) -> int:
+        """Read a persisted data-version counter"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def _bump_version(self, key: str) -> int:
+        """Increment a data-version counter in the meta table
+
+        Persisting the counter keeps ETags and cache keys monotonic across
+        restarts and across gunicorn workers; an in-process counter would
+        restart at zero and revalidate stale client caches with a 304.
+        """
+        self.conn.execute(
+            "INSERT INTO meta(key, value) VALUES (?, 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1", (key,))
+        return self._load_version(key)
+
+    def _save_matches(self, matches: List[Dict]):
+        """Replace the stored screening results in one transaction"""
+        with self._db_lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.execute("DELETE FROM matches")
+                self.conn.executemany("INSERT INTO matches(data) VALUES (?)",
+                                      ((_dumps_line(match),) for match in matches))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _rebuild_norm_arrays(self):
+        """Rebuild the parallel normalized-name arrays used by the matching loops"""
+        for record in self.customers:
+            if "name_norm" not in record:
+                record["name_norm"] = record["name"].strip().lower()
+        for record in self.restricted_parties:
+            if "name_norm" not in record:
+                record["name_norm"] = record["name"].strip().lower()
+        self._customer_norms = [c["name_norm"] for c in self.customers]
+        self._party_norms = [p["name_norm"] for p in self.restricted_parties]
+        # id -> record indices; setdefault keeps the first record on duplicate
+        # ids, matching the old next() scan semantics
+        self._customers_by_id: Dict[int, Dict] = {}
+        for record in self.customers:
+            self._customers_by_id.setdefault(record["id"], record)
+        self._parties_by_id: Dict[int, Dict] = {}
+        for record in self.restricted_parties:
+            self._parties_by_id.setdefault(record["id"], record)
+        self._party_bloom = self._load_party_bloom()
+        if self._party_bloom is None:
+            self._rebuild_party_bloom()
+
+    def _party_fingerprint(self) -> bytes:
+        """Content hash of the party norms that a stored Bloom filter covers"""
+        return hashlib.blake2b("\n".join(self._party_norms).encode(),
+                               digest_size=16).digest()
+
+    def _rebuild_party_bloom(self):
+        """Rebuild the negative-lookup Bloom filter over party norms and persist it"""
+        bloom = _BloomFilter(capacity=2 * len(self._party_norms))
+        for p_norm in self._party_norms:
+            bloom.add(p_norm)
+        self._party_bloom = bloom
+        self._save_party_bloom()
+
+    def _save_party_bloom(self):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta(key, value) VALUES ('party_bloom', ?)",
+            (self._party_fingerprint() + bytes(self._party_bloom.bits),))
+
+    def _load_party_bloom(self):
+        """Load the persisted Bloom filter if it still matches the party norms"""
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'party_bloom'").fetchone()
+        if row is None or row[0][:16] != self._party_fingerprint():
+            return None
+        bits = row[0][16:]
+        bloom = _BloomFilter(capacity=len(bits) * 8 // _BloomFilter.BITS_PER_ITEM,
+                             bits=bits)
+        return bloom if bloom.num_bits == len(bits) * 8 else None
 
     def add_customer(self, name: str, address: str = "", phone: str = "", email: str = "", comments: str = ""):
         """Add a new customer"""
         customer = {
-            "id": len(self.customers) + 1,
+            "id": next(self._cust_id),
             "name": name.strip(),
+            "name_norm": name.strip().lower(),
             "address": address.strip(),
             "phone": phone.strip(),
             "email": email.strip(),
@@ -58,55 +469,173 @@ class CustomerRestrictedPartyTool:
             "created_date": datetime.now().isoformat()
         }
         self.customers.append(customer)
-        self.save_data(self.customers, self.customers_file)
+        self._customer_norms.append(customer["name_norm"])
+        self._customers_by_id.setdefault(customer["id"], customer)
+        self._cust_ver = self._bump_version('cust_ver')
+        self._insert_records("customers", [customer])
         return customer
 
     def add_restricted_party(self, name: str, reason: str = "", source: str = "", comments: str = ""):
         """Add a new restricted party"""
         restricted_party = {
-            "id": len(self.restricted_parties) + 1,
+            "id": next(self._party_id),
             "name": name.strip(),
+            "name_norm": name.strip().lower(),
             "reason": reason.strip(),
             "source": source.strip(),
             "comments": comments.strip(),
             "created_date": datetime.now().isoformat()
         }
         self.restricted_parties.append(restricted_party)
-        self.save_data(self.restricted_parties, self.restricted_parties_file)
+        self._party_norms.append(restricted_party["name_norm"])
+        self._parties_by_id.setdefault(restricted_party["id"], restricted_party)
+        if len(self._party_norms) > self._party_bloom.capacity:
+            self._rebuild_party_bloom()
+        else:
+            self._party_bloom.add(restricted_party["name_norm"])
+            self._save_party_bloom()
+        self._party_ver = self._bump_version('party_ver')
+        self._insert_records("restricted_parties", [restricted_party])
         return restricted_party
 
     def update_customer(self, customer_id: int, data: dict):
         """Update an existing customer"""
-        customer = next((c for c in self.customers if c["id"] == customer_id), None)
+        customer = self._customers_by_id.get(customer_id)
         if customer:
             customer.update(data)
+            if "name" in data:
+                customer["name_norm"] = customer["name"].strip().lower()
+                self._rebuild_norm_arrays()
             customer["modified_date"] = datetime.now().isoformat()
-            self.save_data(self.customers, self.customers_file)
+            self._cust_ver = self._bump_version('cust_ver')
+            self._update_record("customers", customer)
             return customer
         return None
 
     def update_restricted_party(self, party_id: int, data: dict):
         """Update an existing restricted party"""
-        party = next((p for p in self.restricted_parties if p["id"] == party_id), None)
+        party = self._parties_by_id.get(party_id)
         if party:
             party.update(data)
+            if "name" in data:
+                party["name_norm"] = party["name"].strip().lower()
+                self._rebuild_norm_arrays()
             party["modified_date"] = datetime.now().isoformat()
-            self.save_data(self.restricted_parties, self.restricted_parties_file)
+            self._party_ver = self._bump_version('party_ver')
+            self._update_record("restricted_parties", party)
             return party
         return None
 
+    def delete_customer(self, customer_id: int):
+        """Delete a customer"""
+        deleted_customer = self._customers_by_id.get(customer_id)
+        if deleted_customer is None:
+            return None
+        self.customers.remove(deleted_customer)
+        self._rebuild_norm_arrays()
+        self._cust_ver = self._bump_version('cust_ver')
+        self._delete_record("customers", customer_id)
+        return deleted_customer
+
+    def delete_restricted_party(self, party_id: int):
+        """Delete a restricted party"""
+        deleted_party = self._parties_by_id.get(party_id)
+        if deleted_party is None:
+            return None
+        self.restricted_parties.remove(deleted_party)
+        self._rebuild_norm_arrays()
+        self._party_ver = self._bump_version('party_ver')
+        self._delete_record("restricted_parties", party_id)
+        return deleted_party
+
     def calculate_similarity(self, name1: str, name2: str) -> float:
         """Calculate similarity between two names"""
-        return SequenceMatcher(None, name1.lower(), name2.lower()).ratio()
+        return _symmetric_ratio(name1.lower(), name2.lower())
+
+    def _tfidf_matrices(self):
+        """Build (or reuse) TF-IDF char n-gram matrices for customers and parties"""
+        customer_names = tuple(c["name"] for c in self.customers)
+        party_names = tuple(p["name"] for p in self.restricted_parties)
+        if self._tfidf_state and self._tfidf_state[0] == customer_names and self._tfidf_state[1] == party_names:
+            return self._tfidf_state[2], self._tfidf_state[3]
+
+        vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 3), lowercase=True)
+        matrix = vectorizer.fit_transform(customer_names + party_names)
+        customer_matrix = matrix[:len(customer_names)]
+        party_matrix = matrix[len(customer_names):]
+        self._tfidf_state = (customer_names, party_names, customer_matrix, party_matrix)
+        return customer_matrix, party_matrix
+
+    def _party_trigram_index(self):
+        """Build (or reuse) the trigram inverted index over restricted parties"""
+        party_key = tuple(self._party_norms)
+        if self._trigram_state and self._trigram_state[0] == party_key:
+            return self._trigram_state[1], self._trigram_state[2]
+
+        index, party_trigrams = _build_party_trigram_index(self._party_norms)
+        self._trigram_state = (party_key, index, party_trigrams)
+        return index, party_trigrams
 
     def find_similar_matches(self, threshold: float = 0.3):
         """Find customers with similar names to restricted parties"""
+        if SPARSE_MATCHING_AVAILABLE and self.customers and self.restricted_parties:
+            return self._find_similar_matches_sparse(threshold)
+        if self._fts_enabled:
+            return self._find_similar_matches_fts(threshold)
+        if len(self.customers) * len(self.restricted_parties) >= self.PARALLEL_MIN_PAIRS:
+            return self._find_similar_matches_parallel(threshold)
+        return self._find_similar_matches_bruteforce(threshold)
+
+    def _find_similar_matches_sparse(self, threshold: float):
+        """Vectorized similarity search: one sparse top-n matrix product"""
+        customer_matrix, party_matrix = self._tfidf_matrices()
+        sims = sp_matmul_topn(customer_matrix, party_matrix.T, top_n=20, threshold=threshold, sort=True).tocoo()
+
         similar_matches = []
+        for i, j, similarity in zip(sims.row, sims.col, sims.data):
+            customer = self.customers[i]
+            party = self.restricted_parties[j]
+            if self._customer_norms[i] == self._party_norms[j]:
+                continue  # exact matches are reported by find_exact_matches
+            similar_matches.append({
+                "customer": customer,
+                "restricted_party": party,
+                "similarity": float(similarity),
+                "match_type": "similar",
+                "match_date": datetime.now().isoformat()
+            })
 
-        for customer in self.customers:
-            for party in self.restricted_parties:
-                similarity = self.calculate_similarity(customer["name"], party["name"])
-                if similarity >= threshold and similarity < 1.0:
+        return similar_matches
+
+    def _find_similar_matches_fts(self, threshold: float):
+        """Candidate generation through the SQLite trigram index, rescored in process
+
+        Each quoted trigram of the customer name becomes a MATCH term, so a
+        candidate is any party sharing at least one trigram; bm25 rank keeps
+        only the top K per customer before the exact ratio is computed.
+        """
+        similar_matches = []
+        for customer, c_norm in zip(self.customers, self._customer_norms):
+            if len(c_norm) >= 3:
+                query = " OR ".join('"' + gram.replace('"', '""') + '"'
+                                    for gram in _trigrams(c_norm))
+                rows = self.conn.execute(
+                    "SELECT rowid FROM restricted_parties_fts"
+                    " WHERE restricted_parties_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (query, self.FTS_TOP_K))
+                candidates = [self._parties_by_id[party_id] for (party_id,) in rows
+                              if party_id in self._parties_by_id]
+            else:
+                # Below the trigram tokenizer's minimum token length
+                candidates = self.restricted_parties
+
+            for party in candidates:
+                p_norm = party["name_norm"]
+                if fuzz is not None:
+                    similarity = fuzz.ratio(c_norm, p_norm, score_cutoff=threshold * 100) / 100.0
+                else:
+                    similarity = _symmetric_ratio(c_norm, p_norm)
+                if threshold <= similarity < 1.0:
                     similar_matches.append({
                         "customer": customer,
                         "restricted_party": party,
@@ -117,14 +646,52 @@ class CustomerRestrictedPartyTool:
 
         return similar_matches
 
+    def _find_similar_matches_bruteforce(self, threshold: float):
+        """Pairwise fallback used when the vectorized dependencies are missing"""
+        trigram_index, party_trigrams = self._party_trigram_index()
+        return _score_chunk(self.customers, self._customer_norms,
+                            self.restricted_parties, self._party_norms,
+                            threshold, trigram_index, party_trigrams)
+
+    def _find_similar_matches_parallel(self, threshold: float):
+        """Split the fallback scoring across worker processes"""
+        workers = os.cpu_count() or 1
+        chunk_size = math.ceil(len(self.customers) / workers)
+        customer_chunks = [self.customers[i:i + chunk_size]
+                           for i in range(0, len(self.customers), chunk_size)]
+        norm_chunks = [self._customer_norms[i:i + chunk_size]
+                       for i in range(0, len(self._customer_norms), chunk_size)]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_score_chunk, customer_chunks, norm_chunks,
+                                   repeat(self.restricted_parties),
+                                   repeat(self._party_norms), repeat(threshold))
+        return [match for chunk_matches in results for match in chunk_matches]
+
+    def _party_norm_index(self) -> Dict[str, List[Dict]]:
+        """Build (or reuse) the dict of restricted parties keyed by name_norm"""
+        party_key = tuple(self._party_norms)
+        if self._party_index_state and self._party_index_state[0] == party_key:
+            return self._party_index_state[1]
+
+        party_by_norm: Dict[str, List[Dict]] = {}
+        for party, p_norm in zip(self.restricted_parties, self._party_norms):
+            party_by_norm.setdefault(p_norm, []).append(party)
+        self._party_index_state = (party_key, party_by_norm)
+        return party_by_norm
+
     def find_exact_matches(self):
         """Find customers with exact name matches to restricted parties"""
         exact_matches = []
-
-        for customer in self.customers:
-            for party in self.restricted_parties:
-                if customer["name"].lower().strip() == party["name"].lower().strip():
-                    exact_matches.append({
+        party_by_norm = self._party_norm_index()
+
+        for customer, c_norm in zip(self.customers, self._customer_norms):
+            # The Bloom filter answers the common no-match case without
+            # touching the dict or its collision chains.
+            if c_norm not in self._party_bloom:
+                continue
+            for party in party_by_norm.get(c_norm, ()):
+                exact_matches.append({
                         "customer": customer,
                         "restricted_party": party,
                         "similarity": 1.0,
@@ -135,15 +702,28 @@ class CustomerRestrictedPartyTool:
 
         return exact_matches
 
-    def run_screening(self):
-        """Run screening to find both similar and exact matches"""
+    def run_screening(self, threshold: float = 0.3):
+        """Run screening to find both similar and exact matches
+
+        Results are cached per data version, so repeat screenings against
+        unchanged lists return without recomputing or rewriting matches.
+        """
+        cache_key = (self._cust_ver, self._party_ver, threshold)
+        cached = self._screening_cache.get(cache_key)
+        if cached is not None:
+            self.matches = cached
+            return cached
+
         exact_matches = self.find_exact_matches()
-        similar_matches = self.find_similar_matches()
+        similar_matches = self.find_similar_matches(threshold)
         all_matches = exact_matches + similar_matches
 
         self.matches = all_matches
-        self.save_data(self.matches, self.matches_file)
+        self._save_matches(self.matches)
 
+        if len(self._screening_cache) >= 32:
+            self._screening_cache.pop(next(iter(self._screening_cache)))
+        self._screening_cache[cache_key] = all_matches
         return all_matches
 
     def update_hold_type(self, match_index: int, hold_type: str, dtype: str = None):
@@ -152,40 +732,109 @@ class CustomerRestrictedPartyTool:
             self.matches[match_index]["hold_type"] = hold_type
             if dtype:
                 self.matches[match_index]["dtype"] = dtype
-            self.save_data(self.matches, self.matches_file)
+            self._save_matches(self.matches)
             return True
         return False
 
-    def import_customers_from_excel(self, file_path: str):
-        """Import customers from Excel file"""
+    IMPORT_BATCH_SIZE = 10_000
+    # Below this many candidate pairs, process startup costs more than it saves
+    PARALLEL_MIN_PAIRS = 250_000
+    # Candidates kept per customer from the FTS trigram index before rescoring
+    FTS_TOP_K = 50
+
+    @classmethod
+    def _iter_excel_frames(cls, file_or_path):
+        """Yield DataFrames in bounded batches, streaming .xlsx workbooks
+
+        read_only openpyxl keeps peak memory at O(batch) instead of loading
+        the whole workbook; legacy .xls files fall back to a full read.
+        Accepts either a filesystem path or a seekable file-like object.
+        """
+        if isinstance(file_or_path, str):
+            legacy_xls = file_or_path.lower().endswith('.xls')
+        else:
+            # Legacy .xls is an OLE2 container; .xlsx starts with a zip header
+            head = file_or_path.read(4)
+            file_or_path.seek(0)
+            legacy_xls = head == b'\xd0\xcf\x11\xe0'
+        if legacy_xls:
+            yield pd.read_excel(file_or_path)
+            return
+
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_or_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell) if cell is not None else '' for cell in next(rows, ())]
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= cls.IMPORT_BATCH_SIZE:
+                    yield pd.DataFrame(batch, columns=header)
+                    batch = []
+            yield pd.DataFrame(batch, columns=header)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _clean_import_columns(df, optional_columns: List[str]):
+        """Vectorized normalization of the Name and optional string columns"""
+        cleaned = {}
+        for col in ['Name'] + optional_columns:
+            if col in df.columns:
+                series = df[col]
+                cleaned[col.lower()] = series.where(series.notna(), '').astype(str).str.strip()
+            else:
+                cleaned[col.lower()] = pd.Series('', index=df.index)
+        return pd.DataFrame(cleaned)
+
+    def import_customers_from_excel(self, file_or_path):
+        """Import customers from an Excel file path or uploaded stream"""
+        imported_count = 0
         try:
-            # Read Excel file
-            df = pd.read_excel(file_path)
-            imported_count = 0
             errors = []
+            row_offset = 0
 
-            # Check if required columns exist
-            required_columns = ['Name']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                return 0, f"Missing required columns: {', '.join(missing_columns)}. Available columns: {', '.join(df.columns.tolist())}"
-
-            # Process each row
-            for index, row in df.iterrows():
-                try:
-                    name = str(row.get('Name', '')).strip() if pd.notna(row.get('Name')) else ''
-                    if name:  # Only import if name is not empty
-                        address = str(row.get('Address', '')).strip() if pd.notna(row.get('Address')) else ''
-                        phone = str(row.get('Phone', '')).strip() if pd.notna(row.get('Phone')) else ''
-                        email = str(row.get('Email', '')).strip() if pd.notna(row.get('Email')) else ''
-                        comments = str(row.get('Comments', '')).strip() if pd.notna(row.get('Comments')) else ''
-
-                        self.add_customer(name, address, phone, email, comments)
-                        imported_count += 1
-                    else:
-                        errors.append(f"Row {index + 2}: Name is empty")
-                except Exception as row_error:
-                    errors.append(f"Row {index + 2}: {str(row_error)}")
+            try:
+                for df in self._iter_excel_frames(file_or_path):
+                    if row_offset == 0 and imported_count == 0:
+                        # Check if required columns exist
+                        required_columns = ['Name']
+                        missing_columns = [col for col in required_columns if col not in df.columns]
+                        if missing_columns:
+                            return 0, f"Missing required columns: {', '.join(missing_columns)}. Available columns: {', '.join(df.columns.tolist())}"
+
+                    cleaned = self._clean_import_columns(df, ['Address', 'Phone', 'Email', 'Comments'])
+                    mask = cleaned['name'] != ''
+                    errors.extend(f"Row {row_offset + index + 2}: Name is empty" for index in cleaned.index[~mask])
+
+                    created_date = datetime.now().isoformat()
+                    records = []
+                    for row in cleaned[mask].to_dict(orient='records'):
+                        records.append({
+                            "id": next(self._cust_id),
+                            "name": row['name'],
+                            "name_norm": row['name'].lower(),
+                            "address": row['address'],
+                            "phone": row['phone'],
+                            "email": row['email'],
+                            "comments": row['comments'],
+                            "created_date": created_date
+                        })
+
+                    # Insert before extending so a failed batch leaves the
+                    # in-memory list and the database in agreement.
+                    self._insert_records("customers", records)
+                    self.customers.extend(records)
+                    self._cust_ver = self._bump_version('cust_ver')
+                    imported_count += len(records)
+                    row_offset += len(df)
+            finally:
+                # Batches already committed must reach the matching arrays
+                # even when a later batch fails, or screening silently skips
+                # the imported records until an unrelated mutation rebuilds.
+                self._rebuild_norm_arrays()
+                _ratio.cache_clear()
 
             if errors and imported_count == 0:
                 return 0, f"No customers imported. Errors: {'; '.join(errors[:5])}"
@@ -194,27 +843,50 @@ class CustomerRestrictedPartyTool:
 
             return imported_count, None
         except Exception as e:
-            return 0, f"Error reading Excel file: {str(e)}. Please ensure the file is a valid Excel file with a 'Name' column."
-
-    def import_restricted_parties_from_excel(self, file_path: str):
-        """Import restricted parties from Excel file"""
+            return imported_count, (f"Error reading Excel file: {str(e)}. "
+                                    f"{imported_count} customers were imported before the error; "
+                                    "retrying the same file will duplicate them. Please ensure "
+                                    "the file is a valid Excel file with a 'Name' column.")
+
+    def import_restricted_parties_from_excel(self, file_or_path):
+        """Import restricted parties from an Excel file path or uploaded stream"""
+        imported_count = 0
         try:
-            df = pd.read_excel(file_path)
-            imported_count = 0
-
-            for index, row in df.iterrows():
-                name = str(row.get('Name', '')).strip() if pd.notna(row.get('Name')) else ''
-                if name:  # Only import if name is not empty
-                    reason = str(row.get('Reason', '')).strip() if pd.notna(row.get('Reason')) else ''
-                    source = str(row.get('Source', '')).strip() if pd.notna(row.get('Source')) else ''
-                    comments = str(row.get('Comments', '')).strip() if pd.notna(row.get('Comments')) else ''
-
-                    self.add_restricted_party(name, reason, source, comments)
-                    imported_count += 1
-
+            try:
+                for df in self._iter_excel_frames(file_or_path):
+                    if imported_count == 0 and 'Name' not in df.columns:
+                        return 0, f"Missing required columns: Name. Available columns: {', '.join(df.columns.tolist())}"
+
+                    cleaned = self._clean_import_columns(df, ['Reason', 'Source', 'Comments'])
+                    mask = cleaned['name'] != ''
+
+                    created_date = datetime.now().isoformat()
+                    records = []
+                    for row in cleaned[mask].to_dict(orient='records'):
+                        records.append({
+                            "id": next(self._party_id),
+                            "name": row['name'],
+                            "name_norm": row['name'].lower(),
+                            "reason": row['reason'],
+                            "source": row['source'],
+                            "comments": row['comments'],
+                            "created_date": created_date
+                        })
+
+                    self._insert_records("restricted_parties", records)
+                    self.restricted_parties.extend(records)
+                    self._party_ver = self._bump_version('party_ver')
+                    imported_count += len(records)
+            finally:
+                # Keep the matching arrays in step with committed batches
+                # even on a mid-import failure.
+                self._rebuild_norm_arrays()
+                _ratio.cache_clear()
             return imported_count, None
         except Exception as e:
-            return 0, str(e)
+            return imported_count, (f"{str(e)} ({imported_count} restricted parties were "
+                                    "imported before the error; retrying the same file "
+                                    "will duplicate them)")
 
 # Initialize the tool
 tool = CustomerRestrictedPartyTool()
@@ -259,16 +931,17 @@ def api_customers():
             data.get('comments', '')
         )
         return jsonify(customer)
-    return jsonify(tool.customers)
+
+    # ETag on the data version lets unchanged lists come back as a 304
+    response = jsonify(tool.customers)
+    response.set_etag(f"customers-{tool._cust_ver}")
+    return response.make_conditional(request)
 
 @app.route('/api/customers/<int:customer_id>', methods=['PUT', 'DELETE'])
 def api_update_customer(customer_id):
     if request.method == 'DELETE':
-        # Delete customer
-        customer_index = next((i for i, c in enumerate(tool.customers) if c["id"] == customer_id), None)
-        if customer_index is not None:
-            deleted_customer = tool.customers.pop(customer_index)
-            tool.save_data(tool.customers, tool.customers_file)
+        deleted_customer = tool.delete_customer(customer_id)
+        if deleted_customer is not None:
             return jsonify({'success': True, 'deleted_customer': deleted_customer})
         return jsonify({'error': 'Customer not found'}), 404
 
@@ -290,16 +963,16 @@ def api_restricted_parties():
             data.get('comments', '')
         )
         return jsonify(party)
-    return jsonify(tool.restricted_parties)
+
+    response = jsonify(tool.restricted_parties)
+    response.set_etag(f"parties-{tool._party_ver}")
+    return response.make_conditional(request)
 
 @app.route('/api/restricted-parties/<int:party_id>', methods=['PUT', 'DELETE'])
 def api_update_restricted_party(party_id):
     if request.method == 'DELETE':
-        # Delete restricted party
-        party_index = next((i for i, p in enumerate(tool.restricted_parties) if p["id"] == party_id), None)
-        if party_index is not None:
-            deleted_party = tool.restricted_parties.pop(party_index)
-            tool.save_data(tool.restricted_parties, tool.restricted_parties_file)
+        deleted_party = tool.delete_restricted_party(party_id)
+        if deleted_party is not None:
             return jsonify({'success': True, 'deleted_party': deleted_party})
         return jsonify({'error': 'Restricted party not found'}), 404
 
@@ -323,21 +996,9 @@ def upload_customers():
             return jsonify({'error': 'No file selected'}), 400
 
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-
-            # Check if file was saved successfully
-            if not os.path.exists(file_path):
-                return jsonify({'error': 'Failed to save uploaded file'}), 500
-
-            imported_count, error = tool.import_customers_from_excel(file_path)
-
-            # Clean up uploaded file
-            try:
-                os.remove(file_path)
-            except OSError:
-                pass  # File cleanup failed, but don't fail the request
+            # file.stream is already a SpooledTemporaryFile; read it directly
+            # instead of round-tripping the upload through the uploads/ folder.
+            imported_count, error = tool.import_customers_from_excel(file.stream)
 
             if error:
                 return jsonify({'error': error}), 400
@@ -362,14 +1023,7 @@ def upload_restricted_parties():
         return jsonify({'error': 'No file selected'}), 400
 
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-
-        imported_count, error = tool.import_restricted_parties_from_excel(file_path)
-
-        # Clean up uploaded file
-        os.remove(file_path)
+        imported_count, error = tool.import_restricted_parties_from_excel(file.stream)
 
         if error:
             return jsonify({'error': f'Error importing data: {error}'}), 400
@@ -387,10 +1041,6 @@ def download_standalone():
 def download_zip():
     """Download the entire project as ZIP"""
     try:
-        # Create a temporary directory
-        temp_dir = tempfile.mkdtemp()
-        zip_path = os.path.join(temp_dir, 'customer_screening_tool.zip')
-
         # Files and directories to include in the ZIP
         files_to_include = [
             'app.py',
@@ -399,15 +1049,17 @@ def download_zip():
             'README.md',
             'requirements.txt',
             'pyproject.toml',
-            'customers.json',
-            'restricted_parties.json',
-            'matches.json',
+            'screening.db',
             'templates/',
             'static/' if os.path.exists('static') else None
         ]
 
-        # Create ZIP file
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        # Fold the WAL into the main database file so the copy is complete
+        tool.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+        # Build the ZIP in memory; no temp directory to write or leak
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
             for item in files_to_include:
                 if item is None:
                     continue
@@ -420,7 +1072,9 @@ def download_zip():
                             file_path = os.path.join(root, file)
                             zipf.write(file_path, file_path)
 
-        return send_file(zip_path, as_attachment=True, download_name='customer_screening_tool.zip')
+        buffer.seek(0)
+        return send_file(buffer, mimetype='application/zip', as_attachment=True,
+                         download_name='customer_screening_tool.zip')
 
     except Exception as e:
         return jsonify({'error': f'Error creating ZIP file: {str(e)}'}), 500
@@ -3,6 +3,7 @@ import json
 import os
 from datetime import datetime
 from difflib import SequenceMatcher
+from itertools import count
 from typing import List, Dict, Optional
 
 class CustomerRestrictedPartyTool:
@@ -13,6 +14,9 @@ class CustomerRestrictedPartyTool:
         self.customers = self.load_data(self.customers_file)
         self.restricted_parties = self.load_data(self.restricted_parties_file)
         self.matches = self.load_data(self.matches_file)
+        # Monotonic id counters; len(list)+1 collides after deletions
+        self._cust_id = count(max((c["id"] for c in self.customers), default=0) + 1)
+        self._party_id = count(max((p["id"] for p in self.restricted_parties), default=0) + 1)
 
     def load_data(self, filename: str) -> List[Dict]:
         """Load data from JSON file or return empty list if file doesn't exist"""
@@ -32,7 +36,7 @@ class CustomerRestrictedPartyTool:
     def add_customer(self, name: str, address: str = "", phone: str = "", email: str = "", comments: str = ""):
         """Add a new customer"""
         customer = {
-            "id": len(self.customers) + 1,
+            "id": next(self._cust_id),
             "name": name.strip(),
             "address": address.strip(),
             "phone": phone.strip(),
@@ -47,7 +51,7 @@ class CustomerRestrictedPartyTool:
     def add_restricted_party(self, name: str, reason: str = "", source: str = "", comments: str = ""):
         """Add a new restricted party"""
         restricted_party = {
-            "id": len(self.restricted_parties) + 1,
+            "id": next(self._party_id),
             "name": name.strip(),
             "reason": reason.strip(),
             "source": source.strip(),
@@ -122,25 +126,28 @@ class CustomerRestrictedPartyTool:
     def find_exact_matches(self):
         """Find customers with exact name matches to restricted parties"""
         exact_matches = []
-        
+
+        party_by_norm = {}
+        for party in self.restricted_parties:
+            party_by_norm.setdefault(party["name"].lower().strip(), []).append(party)
+
         for customer in self.customers:
-            for party in self.restricted_parties:
-                if customer["name"].lower().strip() == party["name"].lower().strip():
-                    # Ask for hold type for exact matches
-                    print(f"\n*** EXACT MATCH FOUND ***")
-                    print(f"Customer: {customer['name']}")
-                    print(f"Restricted Party: {party['name']}")
-                    
-                    hold_type = self.get_hold_type()
-                    
-                    exact_matches.append({
-                        "customer": customer,
-                        "restricted_party": party,
-                        "similarity": 1.0,
-                        "match_type": "exact",
-                        "hold_type": hold_type,
-                        "match_date": datetime.now().isoformat()
-                    })
+            for party in party_by_norm.get(customer["name"].lower().strip(), ()):
+                # Ask for hold type for exact matches
+                print(f"\n*** EXACT MATCH FOUND ***")
+                print(f"Customer: {customer['name']}")
+                print(f"Restricted Party: {party['name']}")
+
+                hold_type = self.get_hold_type()
+
+                exact_matches.append({
+                    "customer": customer,
+                    "restricted_party": party,
+                    "similarity": 1.0,
+                    "match_type": "exact",
+                    "hold_type": hold_type,
+                    "match_date": datetime.now().isoformat()
+                })
         
         return exact_matches
 